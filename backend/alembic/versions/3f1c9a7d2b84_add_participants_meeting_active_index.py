@@ -0,0 +1,28 @@
+"""Add composite index on participants meeting_id and is_active
+
+Revision ID: 3f1c9a7d2b84
+Revises: be2600e9a49a
+Create Date: 2026-10-15 09:12:31.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b84'
+down_revision: Union[str, Sequence[str], None] = 'be2600e9a49a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_participants_meeting_active', 'participants', ['meeting_id', 'is_active'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_participants_meeting_active', table_name='participants')
@@ -0,0 +1,32 @@
+"""Make participants meeting/active index partial and index meeting logs by meeting and time
+
+Revision ID: 8d2e4b6a1c57
+Revises: 3f1c9a7d2b84
+Create Date: 2026-10-15 11:04:52.617390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6a1c57'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_participants_meeting_active', table_name='participants')
+    op.create_index('ix_participants_meeting_active', 'participants', ['meeting_id', 'is_active'], unique=False, postgresql_where=sa.text('is_active'))
+    op.create_index('ix_meeting_logs_meeting_time', 'meeting_logs', ['meeting_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_meeting_logs_meeting_time', table_name='meeting_logs')
+    op.drop_index('ix_participants_meeting_active', table_name='participants')
+    op.create_index('ix_participants_meeting_active', 'participants', ['meeting_id', 'is_active'], unique=False)
@@ -0,0 +1,56 @@
+"""Store ids and foreign keys as native uuid instead of varchar
+
+Revision ID: c71f0e3a9b25
+Revises: 8d2e4b6a1c57
+Create Date: 2026-10-15 11:38:07.902264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71f0e3a9b25'
+down_revision: Union[str, Sequence[str], None] = '8d2e4b6a1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs holding ids, referenced tables first
+ID_COLUMNS = [
+    ('meetings', 'id'),
+    ('participants', 'id'),
+    ('participants', 'meeting_id'),
+    ('meeting_logs', 'id'),
+    ('meeting_logs', 'meeting_id'),
+    ('meeting_logs', 'participant_id'),
+]
+
+
+def drop_foreign_keys() -> None:
+    op.drop_constraint('meeting_logs_participant_id_fkey', 'meeting_logs', type_='foreignkey')
+    op.drop_constraint('meeting_logs_meeting_id_fkey', 'meeting_logs', type_='foreignkey')
+    op.drop_constraint('participants_meeting_id_fkey', 'participants', type_='foreignkey')
+
+
+def create_foreign_keys() -> None:
+    op.create_foreign_key('participants_meeting_id_fkey', 'participants', 'meetings', ['meeting_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('meeting_logs_meeting_id_fkey', 'meeting_logs', 'meetings', ['meeting_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('meeting_logs_participant_id_fkey', 'meeting_logs', 'participants', ['participant_id'], ['id'], ondelete='SET NULL')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    drop_foreign_keys()
+    for table, column in ID_COLUMNS:
+        op.alter_column(table, column, type_=sa.Uuid(), postgresql_using=f'{column}::uuid')
+    create_foreign_keys()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_foreign_keys()
+    for table, column in ID_COLUMNS:
+        op.alter_column(table, column, type_=sa.String(), postgresql_using=f'{column}::text')
+    create_foreign_keys()
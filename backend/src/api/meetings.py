@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import insert
 from typing import List
 from datetime import datetime, UTC
 
 from src.db.database import get_db
-from src.db.models import Meeting, Participant
+from src.db.cache import cache_meeting, get_meeting_by_code
+from src.db.models import Meeting
+from src.db.queries import COUNT_ACTIVE_PARTICIPANTS, SELECT_ACTIVE_PARTICIPANTS
+from src.core import broker
 from src.core.schemas import MeetingCreate, MeetingResponse, ParticipantResponse
+from src.api.websocket import count_participants, rooms
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,16 +27,20 @@ async def create_meeting(
     """Create a new meeting and return the meeting code"""
     client_ip = request.client.host if request.client else None
     
-    meeting = Meeting(
-        title=meeting_data.title,
-        created_by_ip=client_ip,
-        max_participants=meeting_data.max_participants,
-        started_at=datetime.now(UTC)
+    # RETURNING gives back the generated id, code and defaults in the same round-trip
+    result = await db.execute(
+        insert(Meeting)
+        .values(
+            title=meeting_data.title,
+            created_by_ip=client_ip,
+            max_participants=meeting_data.max_participants,
+            started_at=datetime.now(UTC)
+        )
+        .returning(Meeting)
     )
-    
-    db.add(meeting)
+    meeting = result.scalar_one()
     await db.commit()
-    await db.refresh(meeting)
+    cache_meeting(meeting)
     
     logger.info(f"Meeting created: {meeting.code} from IP {client_ip}")
     
@@ -50,21 +58,20 @@ async def create_meeting(
 @router.get("/{meeting_code}", response_model=MeetingResponse)
 async def get_meeting(meeting_code: str, db: AsyncSession = Depends(get_db)):
     """Get meeting details by code"""
-    result = await db.execute(
-        select(Meeting).where(Meeting.code == meeting_code)
-    )
-    meeting = result.scalar_one_or_none()
+    meeting = await get_meeting_by_code(db, meeting_code)
     
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
-    # Count active participants
-    participant_count_result = await db.execute(
-        select(func.count(Participant.id))
-        .where(Participant.meeting_id == meeting.id)
-        .where(Participant.is_active == True)
-    )
-    participant_count = participant_count_result.scalar() or 0
+    # Live meetings already track their participants in memory, or in Redis
+    # when they may be connected to other workers
+    if meeting_code in rooms or broker.client is not None:
+        participant_count = await count_participants(meeting_code)
+    else:
+        participant_count_result = await db.execute(
+            COUNT_ACTIVE_PARTICIPANTS, {"meeting_id": meeting.id}
+        )
+        participant_count = participant_count_result.scalar() or 0
     
     return MeetingResponse(
         id=meeting.id,
@@ -80,18 +87,13 @@ async def get_meeting(meeting_code: str, db: AsyncSession = Depends(get_db)):
 @router.get("/{meeting_code}/participants", response_model=List[ParticipantResponse])
 async def get_participants(meeting_code: str, db: AsyncSession = Depends(get_db)):
     """Get all active participants in a meeting"""
-    result = await db.execute(
-        select(Meeting).where(Meeting.code == meeting_code)
-    )
-    meeting = result.scalar_one_or_none()
+    meeting = await get_meeting_by_code(db, meeting_code)
     
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
     participants_result = await db.execute(
-        select(Participant)
-        .where(Participant.meeting_id == meeting.id)
-        .where(Participant.is_active == True)
+        SELECT_ACTIVE_PARTICIPANTS, {"meeting_id": meeting.id}
     )
     participants = participants_result.scalars().all()
     
@@ -1,24 +1,115 @@
+from cachetools import TTLCache
+from redis.exceptions import WatchError
 from fastapi import WebSocket, WebSocketDisconnect
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, List
-import json
+from sqlalchemy import insert
+from collections import deque
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+import asyncio
 import logging
+import orjson
 from datetime import datetime, UTC
 
 from src.db.database import AsyncSessionLocal
-from src.db.models import Meeting, Participant, MeetingLog
+from src.db.cache import get_meeting_by_code
+from src.db.models import Participant
+from src.db.queries import no_active_participants
+from src.db.writer import queue_log, queue_participant_update
+from src.core import broker
+from src.core.clock import now_iso
+from src.core.config import settings
 from src.core.schemas import WSMessageType
 
 logger = logging.getLogger(__name__)
 
+# Seconds a single send may take before the recipient is dropped
+SEND_TIMEOUT = 2.0
+
+# Frames that may wait to be sent to one client before it is dropped as stalled
+OUTBOX_SIZE = 64
+
+# Chat messages kept per meeting and replayed to new participants
+CHAT_HISTORY_LIMIT = settings.chat_history_max
+
+# Seconds chat history is kept after a meeting's last participant leaves
+CHAT_HISTORY_TTL = 3600
+
+# Redis channel for broadcasts and keys for chat history and presence, when Redis is configured
+# Presence is a hash of client ID to the participant's current state, shared by all workers
+ROOM_CHANNEL = "room:{}"
+CHAT_HISTORY_KEY = "chat:{}"
+PRESENCE_KEY = "presence:{}"
+
+# Longest display name stored, matching Participant.display_name
+DISPLAY_NAME_MAX = 100
+
+
+@dataclass(slots=True)
+class Connection:
+    """
+    A connected client and the database IDs of its participant record
+    Outgoing frames are queued in outbox and sent in order by the writer task
+    """
+    ws: WebSocket
+    participant_id: str
+    meeting_id: str
+    display_name: Optional[str] = None
+    audio_enabled: bool = True
+    video_enabled: bool = True
+    screen_sharing: bool = False
+    outbox: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=OUTBOX_SIZE))
+    writer: Optional[asyncio.Task] = None
+
+
 # In-memory storage for active WebSocket connections
-# Format: {meeting_code: {client_id: websocket}}
-active_connections: Dict[str, Dict[str, WebSocket]] = {}
+# Format: {(meeting_code, client_id): Connection}
+connections: Dict[Tuple[str, str], Connection] = {}
+
+# Client IDs connected to each meeting; meetings are removed once empty
+# Format: {meeting_code: {client_ids}}
+rooms: Dict[str, Set[str]] = {}
+
+# Store the most recent chat messages in memory (for real-time distribution)
+# Only used without Redis, which otherwise holds the history
+# Format: {meeting_code: deque([messages])}
+chat_messages: Dict[str, Deque[Dict]] = {}
+
+# Encoded CHAT_HISTORY frame per meeting, reused by joins until the next message
+# Format: {meeting_code: payload}
+chat_history_payloads: Dict[str, str] = {}
+
+# Chat history of meetings nobody is connected to, kept in case they rejoin
+# Least recently emptied meetings are evicted first, and all expire after an hour
+idle_chat_messages: TTLCache = TTLCache(maxsize=10_000, ttl=CHAT_HISTORY_TTL)
+
+# Closes of dropped sockets running in the background, kept until they finish
+closing_sockets: Set[asyncio.Task] = set()
+
+
+def add_connection(meeting_code: str, client_id: str, conn: Connection):
+    """Register a client's connection to a meeting and start sending its outbox"""
+    connections[(meeting_code, client_id)] = conn
+    rooms.setdefault(meeting_code, set()).add(client_id)
+    conn.writer = asyncio.create_task(write_outbox(meeting_code, client_id, conn))
+
+
+def remove_connection(meeting_code: str, client_id: str, conn: Connection):
+    """Unregister a client's connection unless it has since been replaced by a reconnect"""
+    key = (meeting_code, client_id)
+    if connections.get(key) is not conn:
+        return
+    
+    del connections[key]
+    room = rooms[meeting_code]
+    room.discard(client_id)
+    if not room:
+        del rooms[meeting_code]
+
 
-# Store chat messages in memory (for real-time distribution)
-# Format: {meeting_code: [messages]}
-chat_messages: Dict[str, List[Dict]] = {}
+def encode(message: Any) -> str:
+    """Serialize an outgoing message as a JSON text frame"""
+    return orjson.dumps(message).decode()
 
 
 async def handle_websocket(
@@ -37,54 +128,44 @@ async def handle_websocket(
     client_ip = websocket.client.host if websocket.client else None
     user_agent = websocket.headers.get("user-agent", "Unknown")
     
-    # Get or create meeting in database
+    # Look up the meeting and create the participant using a single session
     meeting = None
     async with AsyncSessionLocal() as db:
         try:
             # Find meeting by code
-            result = await db.execute(
-                select(Meeting).where(Meeting.code == meeting_code)
-            )
-            meeting = result.scalar_one_or_none()
+            meeting = await get_meeting_by_code(db, meeting_code)
             
             if not meeting:
                 await websocket.close(code=1008, reason="Meeting not found")
                 return
             
-            # Check if this is the first active participant (make them host)
-            existing_participants = await db.execute(
-                select(func.count(Participant.id))
-                .where(Participant.meeting_id == meeting.id)
-                .where(Participant.is_active == True)
-            )
-            count = existing_participants.scalar() or 0
-            is_host = count == 0
-            
-            # Create participant record
-            participant = Participant(
-                meeting_id=meeting.id,
-                client_id=client_id,
-                display_name=None,  # Will be updated when user sends it
-                ip_address=client_ip,
-                user_agent=user_agent,
-                is_active=True,
-                is_host=is_host,
+            # Create participant record; the first active participant becomes
+            # host, decided by the same statement that inserts the row
+            result = await db.execute(
+                insert(Participant)
+                .values(
+                    meeting_id=meeting.id,
+                    client_id=client_id,
+                    display_name=None,  # Will be updated when user sends it
+                    ip_address=client_ip,
+                    user_agent=user_agent,
+                    is_active=True,
+                    is_host=no_active_participants(meeting.id),
+                )
+                .returning(Participant)
             )
-            
-            db.add(participant)
+            participant = result.scalar_one()
+            is_host = participant.is_host
+            await db.commit()
             
             # Log join event
-            log_entry = MeetingLog(
-                meeting_id=meeting.id,
-                participant_id=participant.id,
-                event_type="join",
-                event_data={"client_id": client_id, "ip": client_ip},
+            queue_log(
+                meeting.id,
+                participant.id,
+                "join",
+                {"client_id": client_id, "ip": client_ip},
                 ip_address=client_ip,
             )
-            db.add(log_entry)
-            
-            await db.commit()
-            await db.refresh(participant)
             
             logger.info(f"Participant {client_id} created in database for meeting {meeting_code} (host: {is_host})")
         except Exception as e:
@@ -97,223 +178,287 @@ async def handle_websocket(
     if not meeting:
         return
     
-    # Initialize meeting connections if not exists
-    if meeting_code not in active_connections:
-        active_connections[meeting_code] = {}
-    
-    active_connections[meeting_code][client_id] = websocket
+    conn = Connection(
+        ws=websocket,
+        participant_id=participant.id,
+        meeting_id=meeting.id,
+        display_name=participant.display_name,
+        audio_enabled=participant.audio_enabled,
+        video_enabled=participant.video_enabled,
+        screen_sharing=participant.screen_sharing,
+    )
+    add_connection(meeting_code, client_id, conn)
+    await store_presence(meeting_code, client_id, conn)
+    await keep_chat_history(meeting_code)
     
-    # Initialize chat messages for meeting
-    if meeting_code not in chat_messages:
-        chat_messages[meeting_code] = []
+    # Initialize chat messages for meeting, restoring history if it was idle
+    if broker.client is None and meeting_code not in chat_messages:
+        history = idle_chat_messages.pop(meeting_code, None)
+        chat_messages[meeting_code] = history if history is not None else deque(maxlen=CHAT_HISTORY_LIMIT)
     
     try:
         # Send chat history to newly joined participant
-        if meeting_code in chat_messages:
-            await websocket.send_json({
-                "type": WSMessageType.CHAT_HISTORY,
-                "messages": chat_messages[meeting_code]
-            })
+        await safe_send(meeting_code, client_id, conn, await chat_history_payload(meeting_code))
         
         # Notify others about new participant
-        display_name = None
-        async with AsyncSessionLocal() as db:
-            try:
-                result = await db.execute(
-                    select(Participant).where(Participant.client_id == client_id)
-                )
-                participant = result.scalar_one_or_none()
-                if participant:
-                    display_name = participant.display_name
-            except Exception as e:
-                logger.error(f"Error getting participant display name: {e}")
-        
         await broadcast_to_meeting(meeting_code, {
             "type": WSMessageType.USER_JOINED,
             "clientId": client_id,
-            "displayName": display_name,
-            "timestamp": datetime.now(UTC).isoformat()
+            "displayName": conn.display_name,
+            "timestamp": now_iso()
         }, exclude_client=client_id)
         
         # Send current participants list to new user
-        await send_participants_update(websocket, meeting_code, meeting.id)
+        await send_participants_update(meeting_code, client_id, conn)
         
-        # Main message loop
-        while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+        # Main message loop, ends when the client disconnects
+        async for data in websocket.iter_text():
+            message = orjson.loads(data)
             
             message_type = message.get("type")
-            logger.info(f"Message from {client_id}: {message_type}")
-            
-            # Handle different message types
-            if message_type == WSMessageType.OFFER:
-                await handle_webrtc_signal(meeting_code, client_id, message)
-            
-            elif message_type == WSMessageType.ANSWER:
-                await handle_webrtc_signal(meeting_code, client_id, message)
-            
-            elif message_type == WSMessageType.ICE_CANDIDATE:
-                await handle_webrtc_signal(meeting_code, client_id, message)
-            
-            elif message_type == WSMessageType.CHAT_MESSAGE:
-                await handle_chat_message(meeting_code, client_id, message)
-            
-            elif message_type == WSMessageType.JOIN:
-                await handle_join_message(meeting_code, client_id, message)
-            
-            elif message_type == WSMessageType.AUDIO_TOGGLE:
-                await handle_media_toggle(meeting_code, client_id, message, "audio")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Message from {client_id}: {message_type}")
             
-            elif message_type == WSMessageType.VIDEO_TOGGLE:
-                await handle_media_toggle(meeting_code, client_id, message, "video")
+            # Signaling frames are forwarded as received
+            if message_type in SIGNAL_TYPES:
+                await relay_signal(meeting_code, client_id, message, data)
+                continue
             
-            elif message_type == WSMessageType.SCREEN_SHARE_START:
-                await broadcast_to_meeting(meeting_code, {
-                    "type": WSMessageType.SCREEN_SHARE_START,
-                    "clientId": client_id
-                }, exclude_client=client_id)
-            
-            elif message_type == WSMessageType.SCREEN_SHARE_STOP:
-                await broadcast_to_meeting(meeting_code, {
-                    "type": WSMessageType.SCREEN_SHARE_STOP,
-                    "clientId": client_id
-                }, exclude_client=client_id)
-    
+            handler = MESSAGE_HANDLERS.get(message_type)
+            if handler:
+                await handler(meeting_code, client_id, message, conn)
+            else:
+                logger.warning(f"Unknown message type from {client_id}: {message_type}")
+        
+        logger.info(f"Client {client_id} disconnected from {meeting_code}")
     except WebSocketDisconnect:
         logger.info(f"Client {client_id} disconnected from {meeting_code}")
     except Exception as e:
         logger.error(f"Error in WebSocket for {client_id}: {e}")
     finally:
-        await handle_disconnect(meeting_code, client_id, client_ip)
+        await handle_disconnect(meeting_code, client_id, conn, client_ip)
 
 
-async def send_participants_update(websocket: WebSocket, meeting_code: str, meeting_id: str):
-    """Send current participants list to a specific client"""
-    participant_list = list(active_connections.get(meeting_code, {}).keys())
-    
-    participants_data = []
-    async with AsyncSessionLocal() as db:
-        try:
-            result = await db.execute(
-                select(Participant).where(
-                    Participant.meeting_id == meeting_id,
-                    Participant.is_active == True
-                )
-            )
-            db_participants = result.scalars().all()
-            for p in db_participants:
-                if p.client_id in participant_list:
-                    participants_data.append({
-                        "clientId": p.client_id,
-                        "displayName": p.display_name,
-                        "audioEnabled": p.audio_enabled,
-                        "videoEnabled": p.video_enabled,
-                        "screenSharing": p.screen_sharing
-                    })
-        except Exception as e:
-            logger.error(f"Error fetching participant data: {e}")
-            participants_data = [{"clientId": cid} for cid in participant_list]
+async def send_participants_update(meeting_code: str, client_id: str, conn: Connection):
+    """Send current participants list to a specific client, built from the connections' state"""
+    if broker.client is None:
+        participants_data = [
+            participant_state(cid, connections[(meeting_code, cid)])
+            for cid in rooms.get(meeting_code, ())
+        ]
+    else:
+        participants_data = await load_presence(meeting_code)
     
-    await websocket.send_json({
+    await safe_send(meeting_code, client_id, conn, encode({
         "type": WSMessageType.PARTICIPANTS_UPDATE,
-        "participants": participant_list,
+        "participants": [p["clientId"] for p in participants_data],
         "participantsData": participants_data
-    })
+    }))
+
+
+def participant_state(client_id: str, conn: Connection) -> dict:
+    """A participant's entry in the participants list"""
+    return {
+        "clientId": client_id,
+        "displayName": conn.display_name,
+        "audioEnabled": conn.audio_enabled,
+        "videoEnabled": conn.video_enabled,
+        "screenSharing": conn.screen_sharing
+    }
 
 
-async def handle_webrtc_signal(meeting_code: str, from_client: str, message: dict):
-    """Forward WebRTC signaling messages to target peer"""
+async def store_presence(meeting_code: str, client_id: str, conn: Connection):
+    """
+    Record a client's current state in the meeting's Redis presence hash
+    The participant ID identifies the connection, so a stale one can tell it was replaced
+    """
+    if broker.client is None:
+        return
+    
+    state = {**participant_state(client_id, conn), "participantId": conn.participant_id}
+    try:
+        await broker.client.hset(PRESENCE_KEY.format(meeting_code), client_id, orjson.dumps(state))
+    except Exception as e:
+        logger.error(f"Error storing presence of {client_id} in {meeting_code}: {e}")
+
+
+async def load_presence(meeting_code: str) -> List[Dict]:
+    """Get the state of every participant connected to the meeting on any worker"""
+    try:
+        entries = await broker.client.hvals(PRESENCE_KEY.format(meeting_code))
+    except Exception as e:
+        logger.error(f"Error loading presence for {meeting_code}: {e}")
+        return []
+    
+    participants_data = []
+    for entry in entries:
+        state = orjson.loads(entry)
+        del state["participantId"]
+        participants_data.append(state)
+    return participants_data
+
+
+async def remove_presence(meeting_code: str, client_id: str, conn: Connection) -> bool:
+    """
+    Remove a client's presence entry if it still belongs to this connection,
+    starting the chat history's expiry if it was the meeting's last participant
+    Returns False if the client has since reconnected, possibly to another worker
+    """
+    key = PRESENCE_KEY.format(meeting_code)
+    try:
+        async with broker.client.pipeline() as pipe:
+            while True:
+                try:
+                    # Retried if the hash changes between the check and the delete
+                    await pipe.watch(key)
+                    entry = await pipe.hget(key, client_id)
+                    if entry is None or orjson.loads(entry)["participantId"] != conn.participant_id:
+                        return False
+                    last = await pipe.hlen(key) == 1
+                    pipe.multi()
+                    pipe.hdel(key, client_id)
+                    if last:
+                        pipe.expire(CHAT_HISTORY_KEY.format(meeting_code), CHAT_HISTORY_TTL)
+                    await pipe.execute()
+                    return True
+                except WatchError:
+                    continue
+    except Exception as e:
+        logger.error(f"Error removing presence of {client_id} from {meeting_code}: {e}")
+        return False
+
+
+async def count_participants(meeting_code: str) -> int:
+    """Number of participants connected to a live meeting on any worker"""
+    if broker.client is None:
+        return len(rooms.get(meeting_code, ()))
+    
+    try:
+        return await broker.client.hlen(PRESENCE_KEY.format(meeting_code))
+    except Exception as e:
+        logger.error(f"Error counting participants in {meeting_code}: {e}")
+        return len(rooms.get(meeting_code, ()))
+
+
+async def relay_signal(meeting_code: str, from_client: str, message: dict, raw: str):
+    """
+    Forward a WebRTC signaling message to its target peer
+    The original frame is passed through with the sender appended, so the
+    SDP or ICE payload is never re-serialized
+    A target connected to another worker is reached through Redis
+    """
     target_client = message.get("target")
     
     if not target_client:
         logger.warning(f"No target specified for WebRTC signal from {from_client}")
         return
     
-    if meeting_code in active_connections and target_client in active_connections[meeting_code]:
-        target_ws = active_connections[meeting_code][target_client]
-        
-        await target_ws.send_json({
-            "type": message.get("type"),
-            "from": from_client,
-            "data": message.get("data")
-        })
-        logger.info(f"Forwarded {message.get('type')} from {from_client} to {target_client}")
+    target = connections.get((meeting_code, target_client))
+    if target is None and broker.client is None:
+        return
+    
+    # Appended last so it overrides any "from" the sender put in the frame
+    frame = raw.rstrip()[:-1] + ',"from":' + encode(from_client) + '}'
+    if target:
+        await safe_send(meeting_code, target_client, target, frame)
+    else:
+        await broker.publish(ROOM_CHANNEL.format(meeting_code), {"payload": frame, "target": target_client})
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Forwarded {message.get('type')} from {from_client} to {target_client}")
 
 
-async def handle_chat_message(meeting_code: str, from_client: str, message: dict):
+async def handle_chat_message(meeting_code: str, from_client: str, message: dict, conn: Connection):
     """Handle and broadcast chat messages"""
     chat_data = {
         "type": WSMessageType.CHAT_MESSAGE,
         "from": from_client,
         "message": message.get("message", ""),
         "displayName": message.get("displayName", "Anonymous"),
-        "timestamp": datetime.now(UTC).isoformat()
+        "timestamp": now_iso()
     }
     
-    # Store in memory
-    if meeting_code not in chat_messages:
-        chat_messages[meeting_code] = []
-    chat_messages[meeting_code].append(chat_data)
+    await store_chat_message(meeting_code, chat_data)
     
-    # Log chat message to database
-    async with AsyncSessionLocal() as db:
-        try:
-            await log_chat_message(meeting_code, from_client, message, db)
-        except Exception as e:
-            logger.error(f"Error logging chat message: {e}")
+    # Queue chat message for the database log
+    queue_log(conn.meeting_id, conn.participant_id, "chat_message", {"message": message.get("message", "")})
     
     # Broadcast to all participants
     await broadcast_to_meeting(meeting_code, chat_data)
-    logger.info(f"Chat message from {from_client} in {meeting_code}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Chat message from {from_client} in {meeting_code}")
 
 
-async def log_chat_message(meeting_code: str, from_client: str, message: dict, db: AsyncSession):
-    """Log chat message to database"""
+async def store_chat_message(meeting_code: str, chat_data: dict):
+    """Append a message to the meeting's chat history"""
+    if broker.client is None:
+        if meeting_code not in chat_messages:
+            chat_messages[meeting_code] = deque(maxlen=CHAT_HISTORY_LIMIT)
+        chat_messages[meeting_code].append(chat_data)
+        chat_history_payloads.pop(meeting_code, None)
+        return
+    
+    key = CHAT_HISTORY_KEY.format(meeting_code)
     try:
-        result = await db.execute(
-            select(Meeting).where(Meeting.code == meeting_code)
-        )
-        meeting = result.scalar_one_or_none()
-        if not meeting:
-            return
-        
-        participant_result = await db.execute(
-            select(Participant).where(Participant.client_id == from_client)
-        )
-        participant = participant_result.scalar_one_or_none()
-        
-        log_entry = MeetingLog(
-            meeting_id=meeting.id,
-            participant_id=participant.id if participant else None,
-            event_type="chat_message",
-            event_data={"message": message.get("message", "")},
-            ip_address=None,
-        )
-        db.add(log_entry)
-        await db.commit()
+        async with broker.client.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, orjson.dumps(chat_data))
+            pipe.ltrim(key, -CHAT_HISTORY_LIMIT, -1)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error storing chat message for {meeting_code}: {e}")
+
+
+async def keep_chat_history(meeting_code: str):
+    """Stop a Redis chat history from expiring while the meeting has participants"""
+    if broker.client is None:
+        return
+    
+    try:
+        await broker.client.persist(CHAT_HISTORY_KEY.format(meeting_code))
+    except Exception as e:
+        logger.error(f"Error keeping chat history for {meeting_code}: {e}")
+
+
+async def load_chat_history(meeting_code: str) -> List[Dict]:
+    """Get the meeting's recent chat messages, oldest first"""
+    if broker.client is None:
+        return list(chat_messages.get(meeting_code, ()))
+    
+    try:
+        items = await broker.client.lrange(CHAT_HISTORY_KEY.format(meeting_code), 0, -1)
     except Exception as e:
-        logger.error(f"Error logging chat: {e}")
-        await db.rollback()
+        logger.error(f"Error loading chat history for {meeting_code}: {e}")
+        return []
+    return [orjson.loads(item) for item in items]
 
 
-async def handle_join_message(meeting_code: str, client_id: str, message: dict):
+async def chat_history_payload(meeting_code: str) -> str:
+    """Get the encoded CHAT_HISTORY frame for a meeting, encoding it at most once per new message"""
+    payload = chat_history_payloads.get(meeting_code)
+    if payload is not None:
+        return payload
+    
+    payload = encode({
+        "type": WSMessageType.CHAT_HISTORY,
+        "messages": await load_chat_history(meeting_code)
+    })
+    # Another worker may append to a Redis history, so only cache our own
+    if broker.client is None:
+        chat_history_payloads[meeting_code] = payload
+    return payload
+
+
+async def handle_join_message(meeting_code: str, client_id: str, message: dict, conn: Connection):
     """Handle join message with display name"""
     if "displayName" in message:
         display_name = message["displayName"]
-        async with AsyncSessionLocal() as db:
-            try:
-                result = await db.execute(
-                    select(Participant).where(Participant.client_id == client_id)
-                )
-                participant = result.scalar_one_or_none()
-                if participant:
-                    participant.display_name = display_name
-                    await db.commit()
-                    logger.info(f"Updated display name for {client_id}: {display_name}")
-            except Exception as e:
-                logger.error(f"Error updating participant name: {e}")
-                await db.rollback()
+        if not isinstance(display_name, str):
+            logger.warning(f"Ignoring non-string display name from {client_id}")
+            return
+        display_name = display_name[:DISPLAY_NAME_MAX]
+        conn.display_name = display_name
+        queue_participant_update(conn.participant_id, display_name=display_name)
+        await store_presence(meeting_code, client_id, conn)
         
         # Broadcast display name update
         await broadcast_to_meeting(meeting_code, {
@@ -323,34 +468,14 @@ async def handle_join_message(meeting_code: str, client_id: str, message: dict):
         }, exclude_client=client_id)
 
 
-async def handle_media_toggle(meeting_code: str, client_id: str, message: dict, media_type: str):
+async def handle_media_toggle(meeting_code: str, client_id: str, message: dict, conn: Connection, media_type: str):
     """Handle audio/video toggle events"""
     enabled = message.get("enabled", True)
-    
-    async with AsyncSessionLocal() as db:
-        try:
-            result = await db.execute(
-                select(Participant).where(Participant.client_id == client_id)
-            )
-            participant = result.scalar_one_or_none()
-            if participant:
-                if media_type == "audio":
-                    participant.audio_enabled = enabled
-                else:
-                    participant.video_enabled = enabled
-                await db.commit()
-                
-                log_entry = MeetingLog(
-                    meeting_id=participant.meeting_id,
-                    participant_id=participant.id,
-                    event_type=f"{media_type}_toggle",
-                    event_data={"enabled": enabled},
-                )
-                db.add(log_entry)
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Error updating {media_type} status: {e}")
-            await db.rollback()
+    if not isinstance(enabled, bool):
+        logger.warning(f"Ignoring {media_type} toggle from {client_id} with enabled={enabled!r}")
+        return
+    update_media_state(conn, f"{media_type}_enabled", f"{media_type}_toggle", enabled)
+    await store_presence(meeting_code, client_id, conn)
     
     message_type = WSMessageType.AUDIO_TOGGLE if media_type == "audio" else WSMessageType.VIDEO_TOGGLE
     await broadcast_to_meeting(meeting_code, {
@@ -360,63 +485,171 @@ async def handle_media_toggle(meeting_code: str, client_id: str, message: dict,
     })
 
 
-async def broadcast_to_meeting(meeting_code: str, message: dict, exclude_client: str = None):
-    """Broadcast a message to all participants in a meeting"""
-    if meeting_code not in active_connections:
+async def handle_screen_share(meeting_code: str, client_id: str, message: dict, conn: Connection, sharing: bool):
+    """Handle screen share start/stop events"""
+    update_media_state(conn, "screen_sharing", "screen_share", sharing)
+    await store_presence(meeting_code, client_id, conn)
+    
+    await broadcast_to_meeting(meeting_code, {
+        "type": WSMessageType.SCREEN_SHARE_START if sharing else WSMessageType.SCREEN_SHARE_STOP,
+        "clientId": client_id
+    }, exclude_client=client_id)
+
+
+def update_media_state(conn: Connection, column: str, event_type: str, enabled: bool):
+    """Record a media state change on the connection and queue the update and its log together"""
+    setattr(conn, column, enabled)
+    queue_participant_update(conn.participant_id, **{column: enabled})
+    queue_log(conn.meeting_id, conn.participant_id, event_type, {"enabled": enabled})
+
+
+async def broadcast_to_meeting(meeting_code: str, message: Union[dict, str], exclude_client: str = None):
+    """
+    Broadcast a message to all participants in a meeting
+    Accepts a message dict or a payload already serialized with encode()
+    With Redis configured, other workers deliver it to their own clients
+    """
+    payload = message if isinstance(message, str) else encode(message)
+    
+    if broker.client is None:
+        await deliver_to_meeting(meeting_code, payload, exclude_client)
+        return
+    
+    await asyncio.gather(
+        broker.publish(ROOM_CHANNEL.format(meeting_code), {"payload": payload, "exclude": exclude_client}),
+        deliver_to_meeting(meeting_code, payload, exclude_client),
+    )
+
+
+async def on_room_message(channel: str, message: dict):
+    """Deliver a broadcast or a relayed signal published by another worker"""
+    meeting_code = channel.split(":", 1)[1]
+    target_client = message.get("target")
+    if target_client is None:
+        await deliver_to_meeting(meeting_code, message["payload"], message.get("exclude"))
+        return
+    
+    target = connections.get((meeting_code, target_client))
+    if target:
+        await safe_send(meeting_code, target_client, target, message["payload"])
+
+
+async def deliver_to_meeting(meeting_code: str, payload: str, exclude_client: str = None):
+    """Send a payload to the meeting's participants connected to this worker"""
+    room = rooms.get(meeting_code)
+    if not room:
         return
     
-    connections = list(active_connections[meeting_code].items())
+    recipients = [
+        (client_id, connections[(meeting_code, client_id)])
+        for client_id in room
+        if client_id != exclude_client
+    ]
     
-    for client_id, ws in connections:
-        if exclude_client and client_id == exclude_client:
-            continue
+    await asyncio.gather(*(
+        safe_send(meeting_code, client_id, conn, payload)
+        for client_id, conn in recipients
+    ))
+
+
+async def safe_send(meeting_code: str, client_id: str, conn: Connection, payload: str) -> bool:
+    """Queue a payload for one client, dropping the client if it has fallen too far behind"""
+    try:
+        conn.outbox.put_nowait(payload)
+        return True
+    except asyncio.QueueFull:
+        logger.warning(f"Dropping {client_id}: {conn.outbox.qsize()} frames waiting to be sent")
+        remove_connection(meeting_code, client_id, conn)
+        if conn.writer:
+            conn.writer.cancel()
         
+        # Close in the background so the stalled socket doesn't hold up the sender
+        task = asyncio.create_task(close_socket(conn))
+        closing_sockets.add(task)
+        task.add_done_callback(closing_sockets.discard)
+        return False
+
+
+async def write_outbox(meeting_code: str, client_id: str, conn: Connection):
+    """Send a client's queued payloads in order, dropping the client if a send fails or times out"""
+    while True:
+        payload = await conn.outbox.get()
         try:
-            await ws.send_json(message)
+            # asyncio.timeout rather than wait_for, which can swallow the
+            # cancellation sent on disconnect if the send has just finished
+            async with asyncio.timeout(SEND_TIMEOUT):
+                await conn.ws.send_text(payload)
         except Exception as e:
-            logger.error(f"Error broadcasting to {client_id}: {e}")
-            if meeting_code in active_connections:
-                active_connections[meeting_code].pop(client_id, None)
+            logger.error(f"Error sending to {client_id}: {e!r}")
+            await drop_connection(meeting_code, client_id, conn)
+            return
+        finally:
+            conn.outbox.task_done()
+
+
+async def handle_leave_message(meeting_code: str, client_id: str, message: dict, conn: Connection):
+    """Handle leave message; the socket closing right after runs handle_disconnect"""
+
+
+async def drop_connection(meeting_code: str, client_id: str, conn: Connection):
+    """Remove an unresponsive client and close its socket so its handler cleans up"""
+    remove_connection(meeting_code, client_id, conn)
+    await close_socket(conn)
+
+
+async def close_socket(conn: Connection):
+    """Close a dropped client's socket, giving up after SEND_TIMEOUT"""
+    try:
+        await asyncio.wait_for(conn.ws.close(code=1011), SEND_TIMEOUT)
+    except Exception:
+        pass
 
 
-async def handle_disconnect(meeting_code: str, client_id: str, client_ip: str = None):
+async def handle_disconnect(meeting_code: str, client_id: str, conn: Connection, client_ip: str = None):
     """Handle client disconnection"""
-    async with AsyncSessionLocal() as db:
-        try:
-            result = await db.execute(
-                select(Participant).where(Participant.client_id == client_id)
-            )
-            participant = result.scalar_one_or_none()
-            
-            if participant:
-                participant.is_active = False
-                participant.left_at = datetime.now(UTC)
-                
-                log_entry = MeetingLog(
-                    meeting_id=participant.meeting_id,
-                    participant_id=participant.id,
-                    event_type="leave",
-                    event_data={"client_id": client_id},
-                    ip_address=client_ip,
-                )
-                db.add(log_entry)
-                
-                await db.commit()
-                logger.info(f"Participant {client_id} marked as inactive in database")
-        except Exception as e:
-            logger.error(f"Error updating participant on disconnect: {e}")
-            await db.rollback()
+    if conn.writer:
+        conn.writer.cancel()
     
-    if meeting_code in active_connections:
-        active_connections[meeting_code].pop(client_id, None)
-        
-        if not active_connections[meeting_code]:
-            active_connections.pop(meeting_code, None)
-        else:
-            await broadcast_to_meeting(meeting_code, {
-                "type": WSMessageType.USER_LEFT,
-                "clientId": client_id,
-                "timestamp": datetime.now(UTC).isoformat()
-            })
+    queue_participant_update(conn.participant_id, is_active=False, left_at=datetime.now(UTC))
+    queue_log(conn.meeting_id, conn.participant_id, "leave", {"client_id": client_id}, ip_address=client_ip)
+    
+    remove_connection(meeting_code, client_id, conn)
+    
+    # Skipped when the client has already reconnected, here or on another
+    # worker. Still sent when the local room is now empty, so participants
+    # on other workers hear of it
+    left = client_id not in rooms.get(meeting_code, ())
+    if left and broker.client is not None:
+        left = await remove_presence(meeting_code, client_id, conn)
+    if left:
+        await broadcast_to_meeting(meeting_code, {
+            "type": WSMessageType.USER_LEFT,
+            "clientId": client_id,
+            "timestamp": now_iso()
+        })
+    
+    if meeting_code not in rooms:
+        if meeting_code in chat_messages:
+            idle_chat_messages[meeting_code] = chat_messages.pop(meeting_code)
+        chat_history_payloads.pop(meeting_code, None)
     
     logger.info(f"Client {client_id} removed from {meeting_code}")
+
+
+# WebRTC signaling message types, relayed to a single target peer
+SIGNAL_TYPES = frozenset({
+    WSMessageType.OFFER,
+    WSMessageType.ANSWER,
+    WSMessageType.ICE_CANDIDATE,
+})
+
+# Handlers for all other incoming messages, keyed by message type
+MESSAGE_HANDLERS: Dict[str, Callable[..., Awaitable[None]]] = {
+    WSMessageType.CHAT_MESSAGE: handle_chat_message,
+    WSMessageType.JOIN: handle_join_message,
+    WSMessageType.AUDIO_TOGGLE: partial(handle_media_toggle, media_type="audio"),
+    WSMessageType.VIDEO_TOGGLE: partial(handle_media_toggle, media_type="video"),
+    WSMessageType.SCREEN_SHARE_START: partial(handle_screen_share, sharing=True),
+    WSMessageType.SCREEN_SHARE_STOP: partial(handle_screen_share, sharing=False),
+    WSMessageType.LEAVE: handle_leave_message,
+}
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+import redis.asyncio as redis
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process so it can ignore its own publications
+WORKER_ID = uuid.uuid4().hex
+
+# Seconds to wait before resubscribing after the Redis connection drops
+RESUBSCRIBE_DELAY = 1.0
+
+# Shared Redis client, only created when REDIS_URL is configured
+# Without it everything stays in this process's memory (single worker)
+client: Optional[redis.Redis] = redis.from_url(settings.redis_url) if settings.redis_url else None
+
+
+async def publish(channel: str, message: Dict[str, Any]):
+    """Publish a message to the other workers subscribed to a channel"""
+    envelope = {"worker": WORKER_ID, **message}
+    try:
+        await client.publish(channel, orjson.dumps(envelope))
+    except Exception as e:
+        logger.error(f"Error publishing to {channel}: {e}")
+
+
+async def subscribe_loop(pattern: str, handler: Callable[[str, Dict[str, Any]], Awaitable[None]]):
+    """
+    Call handler(channel, message) for every message other workers publish
+    to channels matching pattern, resubscribing if the connection drops
+    """
+    while True:
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(pattern)
+            async for item in pubsub.listen():
+                if item["type"] != "pmessage":
+                    continue
+
+                try:
+                    message = orjson.loads(item["data"])
+                    if message.pop("worker", None) == WORKER_ID:
+                        continue
+                    await handler(item["channel"].decode(), message)
+                except Exception as e:
+                    logger.error(f"Error handling message on {item['channel']}: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Redis subscription to {pattern} lost: {e}")
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,19 @@
+from time import time as _time
+from datetime import datetime, UTC
+
+# Timestamps handed out within the same tick share one formatted string
+TICKS_PER_SECOND = 4
+
+_cached_tick = -1
+_cached_iso = ""
+
+
+def now_iso() -> str:
+    """Current UTC time as an ISO 8601 string, at most one tick old"""
+    global _cached_tick, _cached_iso
+    
+    tick = int(_time() * TICKS_PER_SECOND)
+    if tick != _cached_tick:
+        _cached_iso = datetime.now(UTC).isoformat()
+        _cached_tick = tick
+    return _cached_iso
@@ -1,10 +1,14 @@
 import os
 import re
+from functools import cached_property
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
 load_dotenv()
 
+POSTGRESQL_SCHEME = re.compile(r'^postgresql:')
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -16,10 +20,13 @@ class Settings(BaseSettings):
     # Database
     database_url: str = os.getenv("DATABASE_URL", "postgresql://localhost/videocall")
     
-    @property
+    @cached_property
     def async_database_url(self) -> str:
         """Convert postgresql:// to postgresql+asyncpg://"""
-        return re.sub(r'^postgresql:', 'postgresql+asyncpg:', self.database_url)
+        return POSTGRESQL_SCHEME.sub('postgresql+asyncpg:', self.database_url)
+    
+    # Redis, used to share chat history and broadcasts between workers
+    redis_url: Optional[str] = os.getenv("REDIS_URL")
     
     # Security
     secret_key: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
@@ -29,7 +36,7 @@ class Settings(BaseSettings):
         """Get CORS origins as string from environment"""
         return os.getenv("CORS_ORIGINS", "http://localhost:5173,https://linkup.ufazien.com")
     
-    @property
+    @cached_property
     def cors_origins(self) -> list[str]:
         """Get CORS origins as a list"""
         return [
@@ -41,6 +48,9 @@ class Settings(BaseSettings):
     # Application
     app_name: str = "LinkUp"
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
+    
+    # Chat messages kept per meeting and replayed to new participants
+    chat_history_max: int = int(os.getenv("CHAT_HISTORY_MAX", "500"))
 
 
 settings = Settings()
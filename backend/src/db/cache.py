@@ -0,0 +1,51 @@
+from cachetools import TTLCache
+from datetime import datetime
+from typing import NamedTuple, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import Meeting
+from src.db.queries import SELECT_MEETING_BY_CODE
+
+
+class CachedMeeting(NamedTuple):
+    """The Meeting columns read on hot paths, which don't change while a meeting runs"""
+    id: str
+    code: str
+    title: Optional[str]
+    created_at: datetime
+    is_active: bool
+    max_participants: int
+
+
+# Recently looked up meetings by code
+meeting_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+
+def cache_meeting(meeting: Meeting) -> CachedMeeting:
+    """Store a meeting in the cache and return its cached form"""
+    cached = CachedMeeting(
+        id=meeting.id,
+        code=meeting.code,
+        title=meeting.title,
+        created_at=meeting.created_at,
+        is_active=meeting.is_active,
+        max_participants=meeting.max_participants,
+    )
+    meeting_cache[meeting.code] = cached
+    return cached
+
+
+async def get_meeting_by_code(db: AsyncSession, code: str) -> Optional[CachedMeeting]:
+    """Get a meeting by code, only querying the database on a cache miss"""
+    cached = meeting_cache.get(code)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(SELECT_MEETING_BY_CODE, {"code": code})
+    row = result.first()
+    if row is None:
+        return None
+
+    cached = CachedMeeting(*row)
+    meeting_cache[code] = cached
+    return cached
@@ -7,6 +7,9 @@ engine = create_async_engine(
     settings.async_database_url,
     echo=settings.debug,
     pool_pre_ping=True,
+    pool_size=20,
+    max_overflow=40,
+    query_cache_size=1200,
 )
 
 # Create async session factory
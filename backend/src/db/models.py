@@ -1,6 +1,8 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Integer, Text, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, Text, ForeignKey, JSON, Index, Uuid, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, UTC
+import base64
+import secrets
 import uuid
 from src.db.database import Base
 
@@ -11,16 +13,14 @@ def generate_uuid():
 
 def generate_meeting_code():
     """Generate a random 10-character meeting code like Google Meet"""
-    import random
-    import string
-    chars = string.ascii_lowercase + string.digits
-    return ''.join(random.choices(chars, k=10))
+    # 10 base32 characters carry 50 random bits from the OS CSPRNG
+    return base64.b32encode(secrets.token_bytes(7))[:10].decode().lower()
 
 
 class Meeting(Base):
     __tablename__ = "meetings"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=generate_uuid)
     code = Column(String(10), unique=True, nullable=False, default=generate_meeting_code, index=True)
     title = Column(String(255), nullable=True)
     created_by_ip = Column(String(45), nullable=True)  # IPv4 or IPv6
@@ -41,9 +41,13 @@ class Meeting(Base):
 
 class Participant(Base):
     __tablename__ = "participants"
+    __table_args__ = (
+        # Only active rows are ever looked up by meeting, so leave the rest out
+        Index("ix_participants_meeting_active", "meeting_id", "is_active", postgresql_where=text("is_active")),
+    )
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    meeting_id = Column(String, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=generate_uuid)
+    meeting_id = Column(Uuid(as_uuid=False), ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
     client_id = Column(String(100), nullable=False, index=True)  # WebSocket client ID
     display_name = Column(String(100), nullable=True)
     ip_address = Column(String(45), nullable=True)
@@ -67,10 +71,13 @@ class Participant(Base):
 
 class MeetingLog(Base):
     __tablename__ = "meeting_logs"
+    __table_args__ = (
+        Index("ix_meeting_logs_meeting_time", "meeting_id", "timestamp"),
+    )
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    meeting_id = Column(String, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
-    participant_id = Column(String, ForeignKey("participants.id", ondelete="SET NULL"), nullable=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=generate_uuid)
+    meeting_id = Column(Uuid(as_uuid=False), ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    participant_id = Column(Uuid(as_uuid=False), ForeignKey("participants.id", ondelete="SET NULL"), nullable=True)
     event_type = Column(String(50), nullable=False)  # join, leave, mute, unmute, start_video, stop_video, etc.
     event_data = Column(JSON, nullable=True)  # Additional event data
     ip_address = Column(String(45), nullable=True)
@@ -0,0 +1,36 @@
+from sqlalchemy import bindparam, exists, func, select
+
+from src.db.models import Meeting, Participant
+
+# Statements used on hot paths, built once at import
+# Execute with the bound parameter values, e.g. db.execute(stmt, {"code": code})
+
+SELECT_MEETING_BY_CODE = select(
+    Meeting.id,
+    Meeting.code,
+    Meeting.title,
+    Meeting.created_at,
+    Meeting.is_active,
+    Meeting.max_participants,
+).where(Meeting.code == bindparam("code"))
+
+SELECT_ACTIVE_PARTICIPANTS = (
+    select(Participant)
+    .where(Participant.meeting_id == bindparam("meeting_id"))
+    .where(Participant.is_active == True)
+)
+
+COUNT_ACTIVE_PARTICIPANTS = (
+    select(func.count(Participant.id))
+    .where(Participant.meeting_id == bindparam("meeting_id"))
+    .where(Participant.is_active == True)
+)
+
+
+def no_active_participants(meeting_id: str):
+    """Scalar subquery that is true when a meeting has no active participants"""
+    return select(
+        ~exists()
+        .where(Participant.meeting_id == meeting_id)
+        .where(Participant.is_active == True)
+    ).scalar_subquery()
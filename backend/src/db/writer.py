@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import DBAPIError, OperationalError, StatementError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.database import AsyncSessionLocal
+from src.db.models import MeetingLog, Participant
+
+logger = logging.getLogger(__name__)
+
+# Flush a batch once it reaches this many events or this many seconds have
+# passed since its first event, whichever comes first
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 0.05
+
+# Events that may wait to be written before new ones are dropped, so a stalled
+# database can't grow the queue without bound
+WRITE_QUEUE_SIZE = 10_000
+
+# Pending writes from the WebSocket handlers
+# Format: ("log", row) or ("participant", (participant_id, values))
+write_queue: asyncio.Queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+
+# Seconds to wait before retrying a batch while the database is unreachable
+RETRY_DELAY = 1.0
+
+# Events taken off the queue but not yet written, oldest first. A batch the
+# database couldn't be reached for stays here and is retried before newer events
+unwritten: List[tuple] = []
+
+
+def queue_log(
+    meeting_id: str,
+    participant_id: Optional[str],
+    event_type: str,
+    event_data: Optional[Dict[str, Any]] = None,
+    ip_address: Optional[str] = None,
+):
+    """Queue a MeetingLog row"""
+    _enqueue(("log", {
+        "meeting_id": meeting_id,
+        "participant_id": participant_id,
+        "event_type": event_type,
+        "event_data": event_data,
+        "ip_address": ip_address,
+    }))
+
+
+def queue_participant_update(participant_id: str, **values):
+    """Queue a column update for a participant"""
+    _enqueue(("participant", (participant_id, values)))
+
+
+def _enqueue(item: tuple):
+    try:
+        write_queue.put_nowait(item)
+    except asyncio.QueueFull:
+        logger.error(f"Write queue full, dropping {item[0]} event")
+
+
+async def write_batch(db: AsyncSession, batch: List[tuple]):
+    """Write a batch of queued events using a single commit"""
+    rows = [data for kind, data in batch if kind == "log"]
+
+    # Coalesce updates so a client toggling repeatedly costs one UPDATE
+    patches: Dict[str, Dict[str, Any]] = {}
+    for kind, data in batch:
+        if kind == "participant":
+            participant_id, values = data
+            patches.setdefault(participant_id, {}).update(values)
+
+    if rows:
+        await db.execute(insert(MeetingLog), rows)
+
+    for participant_id, values in patches.items():
+        await db.execute(
+            update(Participant)
+            .where(Participant.id == participant_id)
+            .values(**values)
+        )
+
+    await db.commit()
+
+
+def _is_unreachable(error: Exception) -> bool:
+    """Whether an error means the database couldn't be reached, rather than rejecting the events"""
+    if isinstance(error, DBAPIError):
+        return isinstance(error, OperationalError) or error.connection_invalidated
+    return isinstance(error, OSError)
+
+
+async def _write(batch: List[tuple]) -> List[tuple]:
+    """
+    Write a batch, returning the events left unwritten because the database
+    couldn't be reached. Events it rejects are retried one at a time and
+    only the failing ones are dropped
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            await write_batch(db, batch)
+            return []
+        except Exception as e:
+            await _rollback(db)
+            if _is_unreachable(e):
+                logger.error(f"Database unavailable, keeping {len(batch)} events: {e}")
+                return batch
+            if not isinstance(e, StatementError):
+                logger.error(f"Dropping batch of {len(batch)} events: {e}")
+                return []
+            logger.error(f"Error writing batch of {len(batch)} events: {e}")
+
+        # Retry one event at a time so a bad event only loses itself
+        for i, item in enumerate(batch):
+            try:
+                await write_batch(db, [item])
+            except Exception as e:
+                await _rollback(db)
+                if _is_unreachable(e):
+                    logger.error(f"Database unavailable, keeping {len(batch) - i} events: {e}")
+                    return batch[i:]
+                logger.error(f"Dropping queued {item[0]} event: {e}")
+        return []
+
+
+async def _rollback(db: AsyncSession):
+    try:
+        await db.rollback()
+    except Exception as e:
+        logger.error(f"Error rolling back write batch: {e}")
+
+
+async def _write_unwritten():
+    """Write the events taken off the queue, keeping them if the database is unreachable"""
+    batch = unwritten.copy()
+    try:
+        remaining = await _write(batch)
+    except Exception as e:
+        # This is the only writer, so log and keep the batch rather than end the task
+        logger.error(f"Error writing batch of {len(batch)} events: {e}")
+        return
+    unwritten[:] = remaining + unwritten[len(batch):]
+
+
+async def flush_pending():
+    """Write everything currently in the queue"""
+    while not write_queue.empty():
+        unwritten.append(write_queue.get_nowait())
+
+    if unwritten:
+        await _write_unwritten()
+    if unwritten:
+        logger.error(f"Could not write {len(unwritten)} queued events")
+
+
+async def db_writer_loop():
+    """Drain the write queue in batches until cancelled"""
+    loop = asyncio.get_running_loop()
+
+    while True:
+        # Events kept from a failed write go first, so updates stay in order
+        if not unwritten:
+            unwritten.append(await write_queue.get())
+        deadline = loop.time() + FLUSH_INTERVAL
+
+        try:
+            # asyncio.timeout_at rather than wait_for, which can swallow the
+            # shutdown cancellation if an event arrives at the same moment
+            async with asyncio.timeout_at(deadline):
+                while len(unwritten) < BATCH_SIZE:
+                    unwritten.append(await write_queue.get())
+        except TimeoutError:
+            pass
+        finally:
+            # Still write what was collected if cancelled mid-batch
+            await _write_unwritten()
+
+        if unwritten:
+            await asyncio.sleep(RETRY_DELAY)
@@ -1,12 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 from datetime import datetime, UTC
 
 from src.core.config import settings
 from src.db.database import engine, Base
+from src.db.writer import db_writer_loop, flush_pending
 from src.api.meetings import router as meetings_router
-from src.api.websocket import handle_websocket, active_connections, chat_messages
+from src.api.websocket import handle_websocket, connections, rooms, on_room_message, ROOM_CHANNEL
+from src.core import broker
 from fastapi import WebSocket
 
 # Configure logging
@@ -30,11 +33,36 @@ app.include_router(meetings_router)
 
 @app.on_event("startup")
 async def startup():
-    """Create database tables on startup"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables created")
+    """Start background tasks; in debug mode also create missing tables"""
+    # Production schemas are managed by Alembic migrations at deploy time
+    if settings.debug:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Database tables created")
     logger.info(f"CORS allowed origins: {settings.cors_origins}")
+    
+    app.state.db_writer = asyncio.create_task(db_writer_loop())
+    
+    if broker.client:
+        app.state.room_subscriber = asyncio.create_task(
+            broker.subscribe_loop(ROOM_CHANNEL.format("*"), on_room_message)
+        )
+        logger.info("Sharing broadcasts and chat history through Redis")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the database writer and flush any queued events"""
+    app.state.db_writer.cancel()
+    try:
+        await app.state.db_writer
+    except asyncio.CancelledError:
+        pass
+    await flush_pending()
+    
+    if broker.client:
+        app.state.room_subscriber.cancel()
+        await broker.client.aclose()
 
 
 @app.get("/")
@@ -43,8 +71,8 @@ async def root():
         "app": settings.app_name,
         "version": "2.0",
         "status": "running",
-        "active_meetings": len(active_connections),
-        "total_participants": sum(len(clients) for clients in active_connections.values())
+        "active_meetings": len(rooms),
+        "total_participants": len(connections)
     }
 
 
@@ -65,5 +93,18 @@ async def websocket_endpoint(
 
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, workers=1)
+    # uvloop and httptools come with uvicorn[standard]; uvloop isn't available on Windows
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    # Signaling messages are small JSON frames, so per-connection
+    # compression costs more memory than it saves in bandwidth
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        workers=1,
+        loop=loop,
+        http="httptools",
+        ws_per_message_deflate=False,
+    )
@@ -0,0 +1,65 @@
+"""Helpers shared by the tests; fixtures live in conftest.py"""
+import asyncio
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.db.models import Meeting
+
+# Test database URL (use in-memory SQLite for testing)
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+# Create test engine; every session shares the one in-memory connection
+test_engine = create_async_engine(
+    TEST_DATABASE_URL,
+    echo=False,
+    poolclass=StaticPool,
+    connect_args={"check_same_thread": False},
+)
+
+
+# Let SQLAlchemy emit BEGIN itself, which the sqlite driver otherwise
+# defers in a way that breaks SAVEPOINTs
+@event.listens_for(test_engine.sync_engine, "connect")
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(test_engine.sync_engine, "begin")
+def _begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+# Create test session factory
+TestSessionLocal = sessionmaker(
+    test_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
+
+async def make_meeting(session: AsyncSession, **values) -> Meeting:
+    """Insert a meeting with one INSERT ... RETURNING, for tests that just need the row"""
+    result = await session.execute(insert(Meeting).values(**values).returning(Meeting))
+    return result.scalar_one()
+
+
+# Headers for POSTing a pre-encoded JSON body with content=
+JSON_HEADERS = {"content-type": "application/json"}
+
+# Requests a test keeps in flight at once when using bounded_gather
+MAX_CONCURRENT_REQUESTS = 8
+
+
+async def bounded_gather(*coros):
+    """asyncio.gather, but running at most MAX_CONCURRENT_REQUESTS of the coroutines at once"""
+    # Created per call, since each test module runs on its own event loop
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(run(coro) for coro in coros))
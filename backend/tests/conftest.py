@@ -1,62 +1,107 @@
+import asyncio
+import httpx
+from types import MappingProxyType
+import orjson
 import pytest
 import pytest_asyncio
-from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from httpx import ASGITransport, AsyncClient
+
+try:
+    import uvloop
+except ImportError:  # Not available on Windows
+    uvloop = None
 
 from src.main import app
 from src.db.database import Base, get_db
 from src.core.config import settings
+from src.db.cache import meeting_cache
+from tests._utils import JSON_HEADERS, TestSessionLocal, test_engine
 
-# Test database URL (use in-memory SQLite for testing)
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
-
-# Create test engine
-test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 
-# Create test session factory
-TestSessionLocal = sessionmaker(
-    test_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop, like the server, where it is installed"""
+    if uvloop is not None:
+        return {"uvloop": uvloop.new_event_loop}
+    return {"asyncio": asyncio.new_event_loop}
 
 
-@pytest_asyncio.fixture
-async def db_session():
-    """Create a fresh database session for each test"""
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def database():
+    """Create the schema once for the whole test session"""
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-    
-    async with TestSessionLocal() as session:
-        yield session
-    
+    yield
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
 
 @pytest_asyncio.fixture
-async def client(db_session):
+async def db_session(database):
+    """
+    Create a database session for each test inside a transaction that is
+    rolled back afterwards; every TestSessionLocal session opened during
+    the test joins it, so their commits only release SAVEPOINTs
+    """
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        TestSessionLocal.configure(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            async with TestSessionLocal() as session:
+                yield session
+        finally:
+            TestSessionLocal.configure(bind=test_engine, join_transaction_mode="conservative_savepoint")
+            await trans.rollback()
+    meeting_cache.clear()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def orjson_responses():
+    """Decode test client responses with orjson instead of the stdlib json module"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(httpx.Response, "json", lambda self, **kwargs: orjson.loads(self.content))
+        yield
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def app_client():
+    """One ASGI test client shared by all tests"""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+@pytest_asyncio.fixture
+async def client(app_client, db_session):
     """Create a test client with database override"""
-    from httpx import ASGITransport
+    # A session per request, like get_db, so concurrent requests don't share
+    # one; the in-memory database is a single connection, so they take turns
+    db_lock = asyncio.Lock()
     
     async def override_get_db():
-        yield db_session
+        async with db_lock, TestSessionLocal() as session:
+            yield session
     
     app.dependency_overrides[get_db] = override_get_db
-    
-    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
-        yield ac
-    
+    yield app_client
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_meeting_data():
     """Sample meeting data for tests"""
-    return {
+    return MappingProxyType({
         "title": "Test Meeting",
         "max_participants": 10
-    }
+    })
+
+
+@pytest.fixture(scope="session")
+def sample_meeting_body(sample_meeting_data):
+    """sample_meeting_data encoded once as a JSON request body"""
+    return orjson.dumps(dict(sample_meeting_data))
+
+
+@pytest_asyncio.fixture
+async def existing_meeting(client, sample_meeting_body):
+    """A meeting created from sample_meeting_data, as returned by the API"""
+    response = await client.post("/api/meetings", content=sample_meeting_body, headers=JSON_HEADERS)
+    return response.json()
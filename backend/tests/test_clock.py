@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from src.core import clock
+
+
+def test_now_iso_is_cached_within_a_tick(monkeypatch):
+    """Test that timestamps are reused within a tick and refreshed after it"""
+    now = [1000.0]
+    monkeypatch.setattr(clock, "_time", lambda: now[0])
+    monkeypatch.setattr(clock, "_cached_tick", -1)
+    monkeypatch.setattr(clock, "_cached_iso", "")
+    
+    first = clock.now_iso()
+    now[0] += 0.1
+    assert clock.now_iso() is first
+    
+    now[0] += 1
+    assert clock.now_iso() is not first
+    datetime.fromisoformat(first)
@@ -1,11 +1,16 @@
+import re
 import pytest
 from httpx import AsyncClient
+from tests._utils import JSON_HEADERS, bounded_gather
+
+# ISO 8601 timestamp as serialized by the API, with optional fraction and offset
+ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?")
 
 
 @pytest.mark.asyncio
-async def test_create_meeting(client: AsyncClient, sample_meeting_data):
+async def test_create_meeting(client: AsyncClient, sample_meeting_data, sample_meeting_body):
     """Test creating a new meeting"""
-    response = await client.post("/api/meetings", json=sample_meeting_data)
+    response = await client.post("/api/meetings", content=sample_meeting_body, headers=JSON_HEADERS)
     
     assert response.status_code == 200
     data = response.json()
@@ -46,27 +51,20 @@ async def test_create_meeting_default_max_participants(client: AsyncClient):
 @pytest.mark.asyncio
 async def test_create_meeting_invalid_max_participants(client: AsyncClient):
     """Test creating a meeting with invalid max_participants"""
-    # Too low
-    response = await client.post("/api/meetings", json={"max_participants": 0})
-    assert response.status_code == 422
-    
-    # Too high
-    response = await client.post("/api/meetings", json={"max_participants": 100})
-    assert response.status_code == 422
+    # Too low, too high and negative
+    responses = await bounded_gather(*[
+        client.post("/api/meetings", json={"max_participants": value})
+        for value in (0, 100, -5)
+    ])
     
-    # Negative
-    response = await client.post("/api/meetings", json={"max_participants": -5})
-    assert response.status_code == 422
+    assert [response.status_code for response in responses] == [422, 422, 422]
 
 
 @pytest.mark.asyncio
-async def test_get_meeting(client: AsyncClient, sample_meeting_data):
+async def test_get_meeting(client: AsyncClient, existing_meeting, sample_meeting_data):
     """Test retrieving a meeting by code"""
-    # First create a meeting
-    create_response = await client.post("/api/meetings", json=sample_meeting_data)
-    meeting_code = create_response.json()["code"]
+    meeting_code = existing_meeting["code"]
     
-    # Then retrieve it
     response = await client.get(f"/api/meetings/{meeting_code}")
     
     assert response.status_code == 200
@@ -78,21 +76,22 @@ async def test_get_meeting(client: AsyncClient, sample_meeting_data):
 
 @pytest.mark.asyncio
 async def test_get_nonexistent_meeting(client: AsyncClient):
-    """Test retrieving a non-existent meeting"""
-    response = await client.get("/api/meetings/nonexistent")
+    """Test retrieving a non-existent meeting and its participants"""
+    responses = await bounded_gather(
+        client.get("/api/meetings/nonexistent"),
+        client.get("/api/meetings/nonexistent/participants"),
+    )
     
-    assert response.status_code == 404
-    assert response.json()["detail"] == "Meeting not found"
+    for response in responses:
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Meeting not found"
 
 
 @pytest.mark.asyncio
-async def test_get_participants_empty(client: AsyncClient, sample_meeting_data):
+async def test_get_participants_empty(client: AsyncClient, existing_meeting):
     """Test getting participants from a meeting with no participants"""
-    # Create a meeting
-    create_response = await client.post("/api/meetings", json=sample_meeting_data)
-    meeting_code = create_response.json()["code"]
+    meeting_code = existing_meeting["code"]
     
-    # Get participants
     response = await client.get(f"/api/meetings/{meeting_code}/participants")
     
     assert response.status_code == 200
@@ -102,28 +101,18 @@ async def test_get_participants_empty(client: AsyncClient, sample_meeting_data):
     assert len(data) == 0
 
 
-@pytest.mark.asyncio
-async def test_get_participants_nonexistent_meeting(client: AsyncClient):
-    """Test getting participants from a non-existent meeting"""
-    response = await client.get("/api/meetings/nonexistent/participants")
-    
-    assert response.status_code == 404
-
-
 @pytest.mark.asyncio
 async def test_multiple_meetings_creation(client: AsyncClient):
     """Test creating multiple meetings and ensure unique codes"""
-    codes = set()
+    responses = await bounded_gather(*[
+        client.post("/api/meetings", json={"title": f"Meeting {i}"})
+        for i in range(5)
+    ])
     
-    for i in range(5):
-        response = await client.post("/api/meetings", json={"title": f"Meeting {i}"})
-        assert response.status_code == 200
-        
-        code = response.json()["code"]
-        assert code not in codes  # Ensure unique codes
-        codes.add(code)
+    assert all(response.status_code == 200 for response in responses)
     
-    assert len(codes) == 5
+    codes = {response.json()["code"] for response in responses}
+    assert len(codes) == 5  # Ensure unique codes
 
 
 @pytest.mark.asyncio
@@ -141,16 +130,42 @@ async def test_meeting_code_format(client: AsyncClient):
 
 
 @pytest.mark.asyncio
-async def test_meeting_timestamps(client: AsyncClient):
+async def test_meeting_timestamps(existing_meeting):
     """Test that meeting has proper timestamps"""
-    response = await client.post("/api/meetings", json={"title": "Timestamp Test"})
-    
-    assert response.status_code == 200
-    data = response.json()
+    data = existing_meeting
     
     assert "created_at" in data
     assert data["created_at"] is not None
     
     # Should be ISO format timestamp
-    from datetime import datetime
-    datetime.fromisoformat(data["created_at"].replace('Z', '+00:00'))
+    assert ISO_TIMESTAMP.fullmatch(data["created_at"])
+
+
+@pytest.mark.asyncio
+async def test_get_meeting_live_participant_count(client: AsyncClient, existing_meeting):
+    """Test that live meetings report the in-memory participant count"""
+    from src.api.websocket import rooms
+    
+    meeting_code = existing_meeting["code"]
+    
+    rooms[meeting_code] = {"c1", "c2"}
+    try:
+        response = await client.get(f"/api/meetings/{meeting_code}")
+    finally:
+        rooms.pop(meeting_code, None)
+    
+    assert response.status_code == 200
+    assert response.json()["participant_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_create_meeting_primes_cache(client: AsyncClient, sample_meeting_data, sample_meeting_body):
+    """Test that a created meeting can be looked up without a database query"""
+    from src.db.cache import meeting_cache
+    
+    response = await client.post("/api/meetings", content=sample_meeting_body, headers=JSON_HEADERS)
+    data = response.json()
+    
+    cached = meeting_cache[data["code"]]
+    assert cached.id == data["id"]
+    assert cached.max_participants == sample_meeting_data["max_participants"]
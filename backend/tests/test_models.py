@@ -1,6 +1,9 @@
 import pytest
-from sqlalchemy import select
-from src.db.models import Meeting, Participant, MeetingLog
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from src.db.models import Meeting, Participant, MeetingLog, generate_meeting_code
+from tests._utils import make_meeting
 
 
 @pytest.mark.asyncio
@@ -27,10 +30,7 @@ async def test_create_meeting_model(db_session):
 async def test_create_participant_model(db_session):
     """Test creating a participant in the database"""
     # Create meeting first
-    meeting = Meeting(code="meet123456", title="Test")
-    db_session.add(meeting)
-    await db_session.commit()
-    await db_session.refresh(meeting)
+    meeting = await make_meeting(db_session, code="meet123456", title="Test")
     
     # Create participant
     participant = Participant(
@@ -59,10 +59,7 @@ async def test_create_participant_model(db_session):
 async def test_meeting_participant_relationship(db_session):
     """Test the relationship between meeting and participants"""
     # Create meeting
-    meeting = Meeting(code="rel123456", title="Relationship Test")
-    db_session.add(meeting)
-    await db_session.commit()
-    await db_session.refresh(meeting)
+    meeting = await make_meeting(db_session, code="rel123456", title="Relationship Test")
     
     # Create participants
     p1 = Participant(meeting_id=meeting.id, client_id="c1", display_name="User 1", is_host=True)
@@ -71,14 +68,17 @@ async def test_meeting_participant_relationship(db_session):
     db_session.add_all([p1, p2])
     await db_session.commit()
     
-    # Query participants directly instead of using relationship
+    # Load the meeting again with its participants eagerly loaded
+    db_session.expunge_all()
     result = await db_session.execute(
-        select(Participant).where(Participant.meeting_id == meeting.id)
+        select(Meeting)
+        .options(selectinload(Meeting.participants))
+        .where(Meeting.id == meeting.id)
     )
-    participants = result.scalars().all()
+    fetched = result.scalar_one()
     
-    assert len(participants) == 2
-    participant_names = {p.display_name for p in participants}
+    assert len(fetched.participants) == 2
+    participant_names = {p.display_name for p in fetched.participants}
     assert participant_names == {"User 1", "User 2"}
 
 
@@ -86,10 +86,7 @@ async def test_meeting_participant_relationship(db_session):
 async def test_meeting_log_creation(db_session):
     """Test creating meeting logs"""
     # Create meeting and participant
-    meeting = Meeting(code="log123456", title="Log Test")
-    db_session.add(meeting)
-    await db_session.commit()
-    await db_session.refresh(meeting)
+    meeting = await make_meeting(db_session, code="log123456", title="Log Test")
     
     participant = Participant(
         meeting_id=meeting.id,
@@ -97,8 +94,7 @@ async def test_meeting_log_creation(db_session):
         display_name="Logger"
     )
     db_session.add(participant)
-    await db_session.commit()
-    await db_session.refresh(participant)
+    await db_session.flush()
     
     # Create log
     log = MeetingLog(
@@ -122,10 +118,7 @@ async def test_meeting_log_creation(db_session):
 @pytest.mark.asyncio
 async def test_participant_toggle_states(db_session):
     """Test toggling participant audio/video states"""
-    meeting = Meeting(code="toggle1234", title="Toggle Test")
-    db_session.add(meeting)
-    await db_session.commit()
-    await db_session.refresh(meeting)
+    meeting = await make_meeting(db_session, code="toggle1234", title="Toggle Test")
     
     participant = Participant(
         meeting_id=meeting.id,
@@ -135,32 +128,22 @@ async def test_participant_toggle_states(db_session):
     db_session.add(participant)
     await db_session.commit()
     
-    # Toggle audio
+    # Toggle audio and video, enable screen sharing
     participant.audio_enabled = False
-    await db_session.commit()
-    await db_session.refresh(participant)
-    assert participant.audio_enabled is False
-    
-    # Toggle video
     participant.video_enabled = False
-    await db_session.commit()
-    await db_session.refresh(participant)
-    assert participant.video_enabled is False
-    
-    # Enable screen sharing
     participant.screen_sharing = True
     await db_session.commit()
     await db_session.refresh(participant)
+    
+    assert participant.audio_enabled is False
+    assert participant.video_enabled is False
     assert participant.screen_sharing is True
 
 
 @pytest.mark.asyncio
 async def test_meeting_active_participants_query(db_session):
     """Test querying only active participants"""
-    meeting = Meeting(code="active1234", title="Active Test")
-    db_session.add(meeting)
-    await db_session.commit()
-    await db_session.refresh(meeting)
+    meeting = await make_meeting(db_session, code="active1234", title="Active Test")
     
     # Create active and inactive participants
     p1 = Participant(meeting_id=meeting.id, client_id="c1", display_name="Active", is_active=True)
@@ -185,13 +168,20 @@ async def test_meeting_active_participants_query(db_session):
 @pytest.mark.asyncio
 async def test_meeting_unique_code(db_session):
     """Test that meeting codes must be unique"""
-    meeting1 = Meeting(code="unique1234", title="First")
-    db_session.add(meeting1)
-    await db_session.commit()
-    
-    # Try to create another meeting with same code
-    meeting2 = Meeting(code="unique1234", title="Second")
-    db_session.add(meeting2)
-    
-    with pytest.raises(Exception):  # Should raise IntegrityError
+    # Insert two meetings with the same code in one statement
+    stmt = insert(Meeting).values([
+        {"code": "unique1234", "title": "First"},
+        {"code": "unique1234", "title": "Second"},
+    ])
+    
+    with pytest.raises(IntegrityError):
+        await db_session.execute(stmt)
         await db_session.commit()
+
+
+def test_generate_meeting_code():
+    """Test that generated meeting codes are 10 lowercase URL-safe characters"""
+    codes = {generate_meeting_code() for _ in range(100)}
+
+    assert len(codes) == 100
+    assert all(len(code) == 10 and code.isalnum() and code == code.lower() for code in codes)
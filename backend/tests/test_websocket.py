@@ -0,0 +1,599 @@
+import asyncio
+import orjson
+import pytest
+from fastapi import WebSocketDisconnect
+from sqlalchemy import select
+from src.api import websocket
+from src.api.websocket import (
+    Connection,
+    add_connection,
+    broadcast_to_meeting,
+    chat_history_payload,
+    chat_history_payloads,
+    chat_messages,
+    connections,
+    encode,
+    handle_chat_message,
+    handle_disconnect,
+    idle_chat_messages,
+    relay_signal,
+    rooms,
+)
+from src.db.models import Meeting, Participant, MeetingLog
+from src.db.writer import flush_pending, write_queue
+from tests._utils import TestSessionLocal
+
+
+class FakeWebSocket:
+    """Records frames sent to it instead of writing to a socket"""
+
+    def __init__(self, fail: bool = False):
+        self.sent = []
+        self.fail = fail
+        self.closed = False
+
+    async def send_text(self, data: str):
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason: str = None):
+        self.closed = True
+
+
+class ClientWebSocket(FakeWebSocket):
+    """Plays a scripted list of incoming messages, then disconnects"""
+
+    client = None
+    headers = {"user-agent": "pytest"}
+
+    def __init__(self, incoming=()):
+        super().__init__()
+        self.incoming = [orjson.dumps(m).decode() for m in incoming]
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self) -> str:
+        # Yield like a real socket would, letting the outbox writer run
+        await asyncio.sleep(0)
+        if not self.incoming:
+            raise WebSocketDisconnect()
+        return self.incoming.pop(0)
+
+    async def iter_text(self):
+        try:
+            while True:
+                yield await self.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+
+async def drain(*conns):
+    """Wait until everything queued for the given connections has been sent"""
+    await asyncio.wait_for(asyncio.gather(*(conn.outbox.join() for conn in conns)), timeout=1)
+
+
+@pytest.fixture
+def meeting_connections():
+    """Register fake connections for a meeting and clean them up afterwards"""
+    added = []
+
+    def add(meeting_code: str, **sockets):
+        conns = {}
+        for client_id, ws in sockets.items():
+            conns[client_id] = Connection(ws=ws, participant_id=f"p-{client_id}", meeting_id="m")
+            add_connection(meeting_code, client_id, conns[client_id])
+        added.extend(conns.values())
+        return conns
+
+    yield add
+    for conn in added:
+        conn.writer.cancel()
+    for task in websocket.closing_sockets:
+        task.cancel()
+    connections.clear()
+    rooms.clear()
+    chat_messages.clear()
+    chat_history_payloads.clear()
+    idle_chat_messages.clear()
+    while not write_queue.empty():
+        write_queue.get_nowait()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_sends_same_payload(meeting_connections):
+    """Test that a broadcast reaches every client except the excluded one"""
+    a, b, c = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    conns = meeting_connections("room", a=a, b=b, c=c)
+
+    await broadcast_to_meeting("room", {"type": "chat-message", "message": "hi"}, exclude_client="c")
+    await drain(*conns.values())
+
+    assert len(a.sent) == 1
+    assert a.sent == b.sent
+    assert c.sent == []
+    assert orjson.loads(a.sent[0]) == {"type": "chat-message", "message": "hi"}
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_failed_connection(meeting_connections):
+    """Test that a client whose send fails is removed from the meeting"""
+    ok, broken = FakeWebSocket(), FakeWebSocket(fail=True)
+    conns = meeting_connections("room", ok=ok, broken=broken)
+
+    await broadcast_to_meeting("room", {"type": "user-left", "clientId": "x"})
+    await drain(*conns.values())
+
+    assert len(ok.sent) == 1
+    assert rooms["room"] == {"ok"}
+    assert ("room", "broken") not in connections
+    assert broken.closed is True
+
+
+@pytest.mark.asyncio
+async def test_broadcast_pre_encoded_payload(meeting_connections):
+    """Test that an already-encoded payload is sent unchanged"""
+    a = FakeWebSocket()
+    conns = meeting_connections("room", a=a)
+
+    payload = encode({"type": "screen-share-start", "clientId": "b"})
+    await broadcast_to_meeting("room", payload)
+    await drain(*conns.values())
+
+    assert a.sent == [payload]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_sends_concurrently(meeting_connections):
+    """Test that a stalled recipient does not hold back the others"""
+    released = asyncio.Event()
+
+    class StalledWebSocket(FakeWebSocket):
+        async def send_text(self, data: str):
+            await released.wait()
+            self.sent.append(data)
+
+    class ReleasingWebSocket(FakeWebSocket):
+        async def send_text(self, data: str):
+            released.set()
+            self.sent.append(data)
+
+    stalled, releasing = StalledWebSocket(), ReleasingWebSocket()
+    conns = meeting_connections("room", stalled=stalled, releasing=releasing)
+
+    await broadcast_to_meeting("room", {"type": "chat-message"})
+    await drain(*conns.values())
+
+    assert len(stalled.sent) == len(releasing.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_slow_connection(meeting_connections, monkeypatch):
+    """Test that a client whose send times out is dropped and closed"""
+    monkeypatch.setattr(websocket, "SEND_TIMEOUT", 0.01)
+
+    class HangingWebSocket(FakeWebSocket):
+        async def send_text(self, data: str):
+            await asyncio.Event().wait()
+
+    ok, hanging = FakeWebSocket(), HangingWebSocket()
+    conns = meeting_connections("room", ok=ok, hanging=hanging)
+
+    await broadcast_to_meeting("room", {"type": "chat-message"})
+    await drain(*conns.values())
+
+    assert len(ok.sent) == 1
+    assert rooms["room"] == {"ok"}
+    assert hanging.closed is True
+
+
+@pytest.mark.asyncio
+async def test_chat_history_is_bounded(meeting_connections, monkeypatch):
+    """Test that only the most recent chat messages are kept"""
+    monkeypatch.setattr(websocket, "CHAT_HISTORY_LIMIT", 3)
+    conns = meeting_connections("room", a=FakeWebSocket())
+
+    for i in range(5):
+        await handle_chat_message("room", "a", {"message": f"msg {i}"}, conns["a"])
+    await drain(conns["a"])
+
+    assert [m["message"] for m in chat_messages["room"]] == ["msg 2", "msg 3", "msg 4"]
+    assert len(conns["a"].ws.sent) == 5
+
+
+@pytest.mark.asyncio
+async def test_chat_history_payload_reused_until_next_message(meeting_connections):
+    """Test that the encoded chat history is reused by joins and refreshed by a new message"""
+    conns = meeting_connections("room", a=FakeWebSocket())
+    await handle_chat_message("room", "a", {"message": "first"}, conns["a"])
+
+    payload = await chat_history_payload("room")
+    assert await chat_history_payload("room") is payload
+
+    await handle_chat_message("room", "a", {"message": "second"}, conns["a"])
+    refreshed = orjson.loads(await chat_history_payload("room"))
+    assert refreshed["type"] == "chat-history"
+    assert [m["message"] for m in refreshed["messages"]] == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_chat_history_moves_to_idle_cache(meeting_connections):
+    """Test that an emptied meeting's chat history is parked in the idle cache"""
+    conns = meeting_connections("room", a=FakeWebSocket())
+    await handle_chat_message("room", "a", {"message": "hello"}, conns["a"])
+
+    await handle_disconnect("room", "a", conns["a"])
+
+    assert "room" not in rooms
+    assert "room" not in chat_messages
+    assert [m["message"] for m in idle_chat_messages["room"]] == ["hello"]
+
+
+@pytest.mark.asyncio
+async def test_handle_websocket_session(db_session, meeting_connections, monkeypatch, caplog):
+    """Test that a connection creates a host participant and records its events"""
+    monkeypatch.setattr(websocket, "AsyncSessionLocal", TestSessionLocal)
+    monkeypatch.setattr("src.db.writer.AsyncSessionLocal", TestSessionLocal)
+
+    meeting = Meeting(code="wsjoin1234", title="Join Test")
+    db_session.add(meeting)
+    await db_session.commit()
+
+    ws = ClientWebSocket([
+        {"type": "join", "displayName": "Alice"},
+        {"type": "audio-toggle", "enabled": False},
+        {"type": "screen-share-start"},
+        {"type": "leave"},
+    ])
+    await websocket.handle_websocket(ws, "wsjoin1234", "client-a")
+    await flush_pending()
+    assert "Unknown message type" not in caplog.text
+
+    sent = [orjson.loads(frame) for frame in ws.sent]
+    update = next(m for m in sent if m["type"] == "participants-update")
+    assert update["participants"] == ["client-a"]
+    assert update["participantsData"][0]["clientId"] == "client-a"
+
+    participant = (await db_session.execute(
+        select(Participant).where(Participant.client_id == "client-a")
+    )).scalar_one()
+    await db_session.refresh(participant)
+    assert participant.is_host is True
+    assert participant.is_active is False
+    assert participant.display_name == "Alice"
+    assert participant.audio_enabled is False
+    assert participant.screen_sharing is True
+
+    logs = (await db_session.execute(
+        select(MeetingLog).where(MeetingLog.meeting_id == meeting.id)
+    )).scalars().all()
+    assert {log.event_type for log in logs} == {"join", "audio_toggle", "screen_share", "leave"}
+    assert all(log.participant_id == participant.id for log in logs)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_keeps_reconnected_client(meeting_connections):
+    """Test that a stale connection's cleanup leaves the client's new connection alone"""
+    old = meeting_connections("room", a=FakeWebSocket(), b=FakeWebSocket())["a"]
+    new = meeting_connections("room", a=FakeWebSocket())["a"]
+
+    await handle_disconnect("room", "a", old)
+
+    assert connections[("room", "a")] is new
+    assert rooms["room"] == {"a", "b"}
+    assert connections[("room", "b")].ws.sent == []
+
+
+@pytest.mark.asyncio
+async def test_relay_signal_passes_frame_through(meeting_connections):
+    """Test that a signaling frame reaches its target with the sender added"""
+    a, b = FakeWebSocket(), FakeWebSocket()
+    conns = meeting_connections("room", a=a, b=b)
+
+    raw = orjson.dumps({"type": "offer", "target": "b", "from": "spoofed", "data": {"sdp": "v=0"}}).decode()
+    await relay_signal("room", "a", orjson.loads(raw), raw)
+    await drain(*conns.values())
+
+    assert a.sent == []
+    forwarded = orjson.loads(b.sent[0])
+    assert forwarded["type"] == "offer"
+    assert forwarded["from"] == "a"
+    assert forwarded["data"] == {"sdp": "v=0"}
+
+
+@pytest.mark.asyncio
+async def test_handle_websocket_second_participant_is_not_host(db_session, meeting_connections, monkeypatch):
+    """Test that joining a meeting with an active participant does not grant host"""
+    monkeypatch.setattr(websocket, "AsyncSessionLocal", TestSessionLocal)
+    monkeypatch.setattr("src.db.writer.AsyncSessionLocal", TestSessionLocal)
+
+    meeting = Meeting(code="wshost1234", title="Host Test")
+    db_session.add(meeting)
+    await db_session.commit()
+    db_session.add(Participant(meeting_id=meeting.id, client_id="client-a", is_host=True))
+    await db_session.commit()
+
+    await websocket.handle_websocket(ClientWebSocket(), "wshost1234", "client-b")
+
+    participant = (await db_session.execute(
+        select(Participant).where(Participant.client_id == "client-b")
+    )).scalar_one()
+    assert participant.is_host is False
+
+
+@pytest.mark.asyncio
+async def test_relay_signal_drops_failed_target(meeting_connections):
+    """Test that a signaling target whose send fails is dropped"""
+    a, broken = FakeWebSocket(), FakeWebSocket(fail=True)
+    conns = meeting_connections("room", a=a, broken=broken)
+
+    raw = orjson.dumps({"type": "ice-candidate", "target": "broken", "data": {}}).decode()
+    await relay_signal("room", "a", orjson.loads(raw), raw)
+    await drain(*conns.values())
+
+    assert rooms["room"] == {"a"}
+    assert broken.closed is True
+
+
+@pytest.fixture
+def redis_broker(monkeypatch):
+    """Back chat history and broadcasts with an in-memory Redis"""
+    import fakeredis.aioredis
+    from src.core import broker
+
+    client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(broker, "client", client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_chat_history_in_redis_is_bounded(meeting_connections, redis_broker, monkeypatch):
+    """Test that chat history kept in Redis is trimmed to the most recent messages"""
+    monkeypatch.setattr(websocket, "CHAT_HISTORY_LIMIT", 3)
+    conns = meeting_connections("room", a=FakeWebSocket())
+
+    for i in range(5):
+        await handle_chat_message("room", "a", {"message": f"msg {i}"}, conns["a"])
+
+    history = await websocket.load_chat_history("room")
+    assert [m["message"] for m in history] == ["msg 2", "msg 3", "msg 4"]
+    assert "room" not in chat_messages
+
+
+@pytest.mark.asyncio
+async def test_chat_history_in_redis_expires_after_last_leave(meeting_connections, redis_broker):
+    """Test that Redis chat history is kept while anyone is connected and expires after"""
+    conns = meeting_connections("room", a=FakeWebSocket(), b=FakeWebSocket())
+    for client_id, conn in conns.items():
+        await websocket.store_presence("room", client_id, conn)
+
+    await handle_chat_message("room", "a", {"message": "hi"}, conns["a"])
+    await handle_disconnect("room", "a", conns["a"])
+    assert await redis_broker.ttl("chat:room") == -1
+
+    await handle_disconnect("room", "b", conns["b"])
+    assert await redis_broker.ttl("chat:room") > 0
+
+    # A new participant stops the expiry again
+    await websocket.keep_chat_history("room")
+    assert await redis_broker.ttl("chat:room") == -1
+
+
+@pytest.mark.asyncio
+async def test_broadcast_published_to_other_workers(meeting_connections, redis_broker):
+    """Test that a broadcast is published for other workers and delivered locally"""
+    a = FakeWebSocket()
+    conns = meeting_connections("room", a=a, b=FakeWebSocket())
+
+    pubsub = redis_broker.pubsub()
+    await pubsub.subscribe("room:room")
+    await pubsub.get_message(timeout=1)
+
+    await broadcast_to_meeting("room", {"type": "chat-message"}, exclude_client="b")
+    await drain(*conns.values())
+
+    published = orjson.loads((await pubsub.get_message(timeout=1))["data"])
+    assert published["exclude"] == "b"
+    assert published["payload"] == a.sent[0]
+    await pubsub.aclose()
+
+
+@pytest.mark.asyncio
+async def test_last_local_leave_published_to_other_workers(meeting_connections, redis_broker):
+    """Test that user-left still reaches other workers when this worker's room empties"""
+    conns = meeting_connections("room", a=FakeWebSocket())
+    await websocket.store_presence("room", "a", conns["a"])
+
+    pubsub = redis_broker.pubsub()
+    await pubsub.subscribe("room:room")
+    await pubsub.get_message(timeout=1)
+
+    await handle_disconnect("room", "a", conns["a"])
+
+    published = orjson.loads((await pubsub.get_message(timeout=1))["data"])
+    left = orjson.loads(published["payload"])
+    assert left["type"] == "user-left"
+    assert left["clientId"] == "a"
+    assert "room" not in rooms
+    assert not await redis_broker.exists("presence:room")
+    await pubsub.aclose()
+
+
+@pytest.mark.asyncio
+async def test_leave_after_reconnect_elsewhere_not_published(meeting_connections, redis_broker):
+    """Test that a stale connection's cleanup doesn't announce a client that reconnected to another worker"""
+    conns = meeting_connections("room", a=FakeWebSocket())
+    await websocket.store_presence("room", "a", conns["a"])
+
+    # The same client reconnects to another worker, which records its new connection
+    elsewhere = Connection(ws=FakeWebSocket(), participant_id="p-a-2", meeting_id="m")
+    await websocket.store_presence("room", "a", elsewhere)
+
+    pubsub = redis_broker.pubsub()
+    await pubsub.subscribe("room:room")
+    await pubsub.get_message(timeout=1)
+
+    await handle_disconnect("room", "a", conns["a"])
+
+    assert await pubsub.get_message(timeout=0.1) is None
+    assert await redis_broker.hexists("presence:room", "a")
+    await pubsub.aclose()
+
+
+@pytest.mark.asyncio
+async def test_participants_update_includes_other_workers(meeting_connections, redis_broker):
+    """Test that the participants list includes clients connected to other workers"""
+    conns = meeting_connections("room", b=FakeWebSocket())
+    await websocket.store_presence("room", "b", conns["b"])
+
+    remote = Connection(ws=FakeWebSocket(), participant_id="p-a", meeting_id="m", display_name="Alice")
+    remote.video_enabled = False
+    await websocket.store_presence("room", "a", remote)
+
+    await websocket.send_participants_update("room", "b", conns["b"])
+    await drain(conns["b"])
+
+    update = orjson.loads(conns["b"].ws.sent[0])
+    assert sorted(update["participants"]) == ["a", "b"]
+    alice = next(p for p in update["participantsData"] if p["clientId"] == "a")
+    assert alice == {"clientId": "a", "displayName": "Alice", "audioEnabled": True,
+                     "videoEnabled": False, "screenSharing": False}
+    assert await websocket.count_participants("room") == 2
+
+
+@pytest.mark.asyncio
+async def test_subscription_survives_malformed_message(redis_broker):
+    """Test that a publication that is not JSON is skipped without resubscribing"""
+    from src.core import broker
+
+    received = asyncio.Queue()
+
+    async def handler(channel, message):
+        received.put_nowait((channel, message))
+
+    task = asyncio.create_task(broker.subscribe_loop("room:*", handler))
+    try:
+        while not await redis_broker.pubsub_numpat():
+            await asyncio.sleep(0.01)
+        await redis_broker.publish("room:room", b"not json")
+        await redis_broker.publish("room:room", orjson.dumps({"worker": "other", "payload": "ok"}))
+
+        channel, message = await asyncio.wait_for(received.get(), timeout=1)
+        assert channel == "room:room"
+        assert message == {"payload": "ok"}
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_room_message_delivered_locally(meeting_connections):
+    """Test that a broadcast from another worker reaches this worker's clients"""
+    a, b = FakeWebSocket(), FakeWebSocket()
+    conns = meeting_connections("room", a=a, b=b)
+
+    payload = encode({"type": "user-joined", "clientId": "remote"})
+    await websocket.on_room_message("room:room", {"payload": payload, "exclude": "b"})
+    await drain(*conns.values())
+
+    assert a.sent == [payload]
+    assert b.sent == []
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_client_with_full_outbox(meeting_connections, monkeypatch):
+    """Test that a client too far behind is dropped without holding up the others"""
+    monkeypatch.setattr(websocket, "OUTBOX_SIZE", 2)
+
+    class HangingWebSocket(FakeWebSocket):
+        async def send_text(self, data: str):
+            await asyncio.Event().wait()
+
+        async def close(self, code: int = 1000, reason: str = None):
+            self.closed = True
+            await asyncio.Event().wait()
+
+    ok, hanging = FakeWebSocket(), HangingWebSocket()
+    conns = meeting_connections("room", ok=ok, hanging=hanging)
+
+    for i in range(4):
+        # The stalled socket's close must not delay the broadcast
+        await asyncio.wait_for(
+            broadcast_to_meeting("room", {"type": "chat-message", "message": f"msg {i}"}),
+            timeout=0.5,
+        )
+    await drain(conns["ok"])
+    await asyncio.sleep(0)
+
+    assert len(ok.sent) == 4
+    assert rooms["room"] == {"ok"}
+    assert hanging.closed is True
+    assert conns["hanging"].writer.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_invalid_client_values_not_queued(meeting_connections):
+    """Test that malformed toggles are ignored and long display names truncated"""
+    conns = meeting_connections("room", a=FakeWebSocket())
+
+    await websocket.handle_media_toggle("room", "a", {"enabled": "nope"}, conns["a"], "audio")
+    assert write_queue.empty()
+    assert conns["a"].audio_enabled is True
+
+    await websocket.handle_join_message("room", "a", {"displayName": "x" * 500}, conns["a"])
+    kind, (_, values) = write_queue.get_nowait()
+    assert kind == "participant"
+    assert values["display_name"] == "x" * websocket.DISPLAY_NAME_MAX
+
+
+@pytest.mark.asyncio
+async def test_participants_update_uses_connection_state(meeting_connections):
+    """Test that the participants list is built from the other connections' current state"""
+    conns = meeting_connections("room", a=FakeWebSocket(), b=FakeWebSocket())
+    conns["b"].display_name = "Bob"
+    conns["b"].audio_enabled = False
+
+    await websocket.send_participants_update("room", "a", conns["a"])
+    await drain(conns["a"])
+
+    update = orjson.loads(conns["a"].ws.sent[0])
+    assert sorted(update["participants"]) == ["a", "b"]
+    bob = next(p for p in update["participantsData"] if p["clientId"] == "b")
+    assert bob["displayName"] == "Bob"
+    assert bob["audioEnabled"] is False
+    assert conns["b"].ws.sent == []
+
+
+@pytest.mark.asyncio
+async def test_relay_signal_published_for_remote_target(meeting_connections, redis_broker):
+    """Test that a signal for a client on another worker is published with its target"""
+    conns = meeting_connections("room", a=FakeWebSocket())
+
+    pubsub = redis_broker.pubsub()
+    await pubsub.subscribe("room:room")
+    await pubsub.get_message(timeout=1)
+
+    raw = orjson.dumps({"type": "answer", "target": "remote", "data": {"sdp": "v=0"}}).decode()
+    await relay_signal("room", "a", orjson.loads(raw), raw)
+
+    published = orjson.loads((await pubsub.get_message(timeout=1))["data"])
+    assert published["target"] == "remote"
+    assert orjson.loads(published["payload"])["from"] == "a"
+    await drain(conns["a"])
+    assert conns["a"].ws.sent == []
+    await pubsub.aclose()
+
+
+@pytest.mark.asyncio
+async def test_room_message_delivers_signal_to_target_only(meeting_connections):
+    """Test that a signal relayed from another worker reaches only its target"""
+    a, b = FakeWebSocket(), FakeWebSocket()
+    conns = meeting_connections("room", a=a, b=b)
+
+    frame = encode({"type": "offer", "target": "b", "from": "remote"})
+    await websocket.on_room_message("room:room", {"payload": frame, "target": "b"})
+    await drain(*conns.values())
+
+    assert a.sent == []
+    assert b.sent == [frame]
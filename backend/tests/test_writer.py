@@ -0,0 +1,164 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from src.db.models import Participant, MeetingLog
+from src.db import writer
+from src.db.writer import write_batch
+from tests._utils import TestSessionLocal, make_meeting
+
+
+@pytest.mark.asyncio
+async def test_write_batch_logs_and_updates(db_session):
+    """Test writing queued logs and participant updates in one batch"""
+    meeting = await make_meeting(db_session, code="batch12345", title="Batch Test")
+
+    participant = Participant(meeting_id=meeting.id, client_id="client-batch")
+    db_session.add(participant)
+    await db_session.commit()
+
+    batch = [
+        ("participant", (participant.id, {"audio_enabled": False})),
+        ("log", {"meeting_id": meeting.id, "participant_id": participant.id,
+                 "event_type": "audio_toggle", "event_data": {"enabled": False},
+                 "ip_address": None}),
+        ("participant", (participant.id, {"display_name": "Batcher"})),
+        ("log", {"meeting_id": meeting.id, "participant_id": participant.id,
+                 "event_type": "chat_message", "event_data": {"message": "hi"},
+                 "ip_address": None}),
+    ]
+    await write_batch(db_session, batch)
+
+    await db_session.refresh(participant)
+    assert participant.audio_enabled is False
+    assert participant.display_name == "Batcher"
+
+    result = await db_session.execute(
+        select(MeetingLog).where(MeetingLog.meeting_id == meeting.id)
+    )
+    logs = result.scalars().all()
+
+    assert {log.event_type for log in logs} == {"audio_toggle", "chat_message"}
+    assert all(log.participant_id == participant.id for log in logs)
+
+
+@pytest.mark.asyncio
+async def test_write_batch_coalesces_updates(db_session):
+    """Test that repeated updates to one participant keep the latest value"""
+    meeting = await make_meeting(db_session, code="merge12345", title="Coalesce Test")
+
+    participant = Participant(meeting_id=meeting.id, client_id="client-merge")
+    db_session.add(participant)
+    await db_session.commit()
+
+    batch = [
+        ("participant", (participant.id, {"video_enabled": False})),
+        ("participant", (participant.id, {"video_enabled": True})),
+        ("participant", (participant.id, {"video_enabled": False})),
+    ]
+    await write_batch(db_session, batch)
+
+    await db_session.refresh(participant)
+    assert participant.video_enabled is False
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_keeps_other_events(db_session, monkeypatch):
+    """Test that one bad event in a batch does not discard the others"""
+    monkeypatch.setattr(writer, "AsyncSessionLocal", TestSessionLocal)
+    meeting = await make_meeting(db_session, code="fail123456", title="Retry Test")
+
+    good = Participant(meeting_id=meeting.id, client_id="client-good")
+    bad = Participant(meeting_id=meeting.id, client_id="client-bad")
+    db_session.add_all([good, bad])
+    await db_session.commit()
+
+    batch = [
+        ("participant", (bad.id, {"audio_enabled": "nope"})),
+        ("log", {"meeting_id": meeting.id, "participant_id": good.id,
+                 "event_type": "chat_message", "event_data": {"message": "hi"},
+                 "ip_address": None}),
+        ("participant", (good.id, {"is_active": False})),
+    ]
+    await writer._write(batch)
+
+    await db_session.refresh(good)
+    await db_session.refresh(bad)
+    assert good.is_active is False
+    assert bad.audio_enabled is True
+
+    result = await db_session.execute(
+        select(MeetingLog).where(MeetingLog.meeting_id == meeting.id)
+    )
+    assert [log.event_type for log in result.scalars()] == ["chat_message"]
+
+
+class BrokenSession:
+    """A session whose every statement and rollback fails, like a dropped connection"""
+
+    def __init__(self):
+        self.attempts = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def execute(self, *args, **kwargs):
+        self.attempts += 1
+        raise OperationalError("UPDATE", {}, Exception("connection lost"))
+
+    async def rollback(self):
+        raise OperationalError("ROLLBACK", {}, Exception("connection lost"))
+
+
+@pytest.mark.asyncio
+async def test_writer_loop_survives_failed_rollback(monkeypatch):
+    """Test that the writer task keeps running when a rollback fails"""
+    session = BrokenSession()
+    monkeypatch.setattr(writer, "AsyncSessionLocal", lambda: session)
+    monkeypatch.setattr(writer, "RETRY_DELAY", 0.01)
+
+    task = asyncio.create_task(writer.db_writer_loop())
+    try:
+        writer.queue_participant_update("p-1", is_active=False)
+        while session.attempts == 0:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(writer.FLUSH_INTERVAL * 2)
+        assert not task.done()
+
+        attempts = session.attempts
+        writer.queue_participant_update("p-2", is_active=False)
+        while session.attempts == attempts:
+            await asyncio.sleep(0.01)
+        assert writer.write_queue.empty()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        writer.unwritten.clear()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_database_keeps_batch(db_session, monkeypatch):
+    """Test that a batch is kept whole, not retried per event, while the database is down"""
+    session = BrokenSession()
+    monkeypatch.setattr(writer, "AsyncSessionLocal", lambda: session)
+    batch = [("participant", (f"p-{i}", {"is_active": False})) for i in range(100)]
+
+    assert await writer._write(batch) == batch
+    assert session.attempts == 1
+
+    # Written once the database is back
+    meeting = await make_meeting(db_session, code="back123456", title="Outage Test")
+    participant = Participant(meeting_id=meeting.id, client_id="client-back")
+    db_session.add(participant)
+    await db_session.commit()
+
+    monkeypatch.setattr(writer, "AsyncSessionLocal", TestSessionLocal)
+    writer.unwritten.append(("participant", (participant.id, {"is_active": False})))
+    await writer.flush_pending()
+
+    assert writer.unwritten == []
+    await db_session.refresh(participant)
+    assert participant.is_active is False